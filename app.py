@@ -1,11 +1,15 @@
 import os
 from pathlib import Path
 
-from flask import Flask, redirect, url_for, request
+from flask import Flask, g, redirect, url_for, request, has_request_context
 from flask_compress import Compress
 from flask_login import LoginManager, current_user
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+from cache import cache, login_throttle
 from models import db, User, Journal, Issue, Article
 from routes_public import register_public_routes
 from routes_admin import register_admin_routes
@@ -20,15 +24,36 @@ BASE_DIR = Path(__file__).parent
 app = Flask(__name__)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 Compress(app)  # Gzip/Brotli сжатие
+cache.init_app(app, config={
+    'CACHE_TYPE': 'FileSystemCache',  # общий для всех воркеров gunicorn
+    'CACHE_DIR': str(BASE_DIR / 'instance' / 'cache'),
+    'CACHE_DEFAULT_TIMEOUT': 300,
+})
+login_throttle.init_app(app, config={
+    'CACHE_TYPE': 'FileSystemCache',
+    'CACHE_DIR': str(BASE_DIR / 'instance' / 'login_throttle'),
+    'CACHE_THRESHOLD': 10000,  # по записи на IP с неудачным входом за минуту
+})
 
 # Настройки
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-insecure-key-change-me')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///publisher.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000
+# Бэкапы за nginx отдаются через X-Accel-Redirect (internal-location с этим префиксом);
+# пусто — отдаём сами через send_file
+app.config['BACKUPS_ACCEL_PREFIX'] = os.environ.get('BACKUPS_ACCEL_PREFIX', '')
+# Больше запросов к БД за один HTTP-запрос — предупреждение в лог (признак N+1).
+# По умолчанию только в режиме отладки; 0 — выключено (счётчик не подключается)
+app.config['QUERY_COUNT_WARN'] = int(os.environ.get('QUERY_COUNT_WARN', '10' if app.debug else '0'))
 
-# Кэширование шаблонов
-app.jinja_env.auto_reload = os.environ.get('FLASK_DEBUG', '1') == '1'
+# Кэширование шаблонов: перечитываем с диска только в режиме отладки
+# (app.run(debug=True) включит auto_reload сам), скомпилированные шаблоны
+# храним на диске — воркеры после рестарта не компилируют их заново
+app.jinja_env.auto_reload = app.debug
+JINJA_CACHE_DIR = BASE_DIR / 'instance' / 'jinja_cache'
+JINJA_CACHE_DIR.mkdir(exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=str(JINJA_CACHE_DIR))
 
 # Папки для загрузок
 UPLOAD_COVERS = str(BASE_DIR / 'static' / 'uploads' / 'covers')
@@ -48,7 +73,47 @@ login_manager.login_message_category = 'info'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Битая cookie — просто анонимный пользователь, без исключения
+    if not user_id.isdigit():
+        return None
+    return db.session.get(User, int(user_id))
+
+
+# ============================================================
+#   ПРОВЕРКА СХЕМЫ: после обновления кода без init-db запросы
+#   к новым колонкам падали бы где попало — падаем сразу и понятно.
+#   Проверяется один раз на процесс, перед первым запросом: при
+#   импорте нельзя — app импортируют и init-db, и migrate_old_db.py
+#   до создания схемы.
+# ============================================================
+def _missing_schema():
+    """Таблицы и колонки моделей, которых нет в БД: (имена таблиц, объекты Column)."""
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    tables, columns = [], []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            tables.append(table.name)
+            continue
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+        columns.extend(c for c in table.columns if c.name not in existing)
+    return tables, columns
+
+
+_schema_checked = False
+
+
+@app.before_request
+def check_schema():
+    """Останавливает обработку запросов, пока схема БД не обновлена через init-db."""
+    global _schema_checked
+    if _schema_checked:
+        return
+    tables, columns = _missing_schema()
+    if tables or columns:
+        missing = ', '.join(tables + [f'{c.table.name}.{c.name}' for c in columns])
+        raise RuntimeError(f'Схема БД устарела (нет: {missing}). Выполните: flask --app app init-db')
+    _schema_checked = True
 
 
 # ============================================================
@@ -57,16 +122,18 @@ def load_user(user_id):
 #   или удалите/закомментируйте этот блок.
 # ============================================================
 SITE_PUBLIC = os.environ.get('SITE_PUBLIC', '0') == '1'
+app.config['SITE_PUBLIC'] = SITE_PUBLIC  # api_search: кэшировать ли ответ на прокси/CDN
+STATIC_PREFIX = app.static_url_path + '/'
 
 
-@app.before_request
 def require_login():
     """Если сайт не публичный — требуем авторизацию на всех страницах."""
-    if SITE_PUBLIC:
-        return  # сайт открыт для всех
+    # Статику пропускаем по префиксу пути, без разбора endpoint
+    if request.path.startswith(STATIC_PREFIX):
+        return
 
-    # Пропускаем без проверки: страницу логина, статику, logout
-    if request.endpoint and request.endpoint in ('admin_login', 'static'):
+    # Страницу логина тоже пропускаем
+    if request.endpoint == 'admin_login':
         return
 
     # Если не авторизован — на страницу входа (с сохранением куда шёл)
@@ -74,13 +141,144 @@ def require_login():
         return redirect(url_for('admin_login', next=request.path))
 
 
+# Для публичного сайта хук не регистрируется вовсе
+if not SITE_PUBLIC:
+    app.before_request(require_login)
+
+
+# ============================================================
+#   СЧЁТЧИК ЗАПРОСОВ К БД: ловим N+1 без правки маршрутов
+# ============================================================
+if app.config['QUERY_COUNT_WARN']:
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        # Запросы вне HTTP-запроса (init-db, CLI) не считаем
+        if has_request_context():
+            g._query_count = g.get('_query_count', 0) + 1
+
+    @app.after_request
+    def _warn_query_count(response):
+        query_count = g.get('_query_count', 0)
+        if query_count > app.config['QUERY_COUNT_WARN']:
+            app.logger.warning('%s: %d запросов к БД', request.path, query_count)
+        return response
+
+
 # Инициализация БД и маршрутов
 db.init_app(app)
 register_public_routes(app)
 register_admin_routes(app)
 
-with app.app_context():
-    db.create_all()
+
+# Индексы, убранные из моделей: init-db удаляет их из уже созданных БД
+DROPPED_INDEXES = [
+    # одноколоночные index=True, заменены составными с тем же первым столбцом
+    'ix_issue_journal_id',  # -> ix_issue_journal_year_number
+    'ix_article_issue_id',  # -> ix_article_issue_order
+    'ix_article_author_article_id',  # -> ix_article_author_article_order
+    'ix_article_published_issue_order',  # дублировал ix_article_issue_order
+    # заменены одним ix_article_search_text_trgm
+    'ix_article_title_trgm',
+    'ix_article_abstract_trgm',
+    'ix_article_keywords_trgm',
+    'ix_article_author_full_name_trgm',
+]
+
+
+def init_db():
+    """Создание таблиц и индексов (не при импорте — воркеры gunicorn не трогают схему).
+
+    Запускать и при обновлении кода, до перезапуска сервиса: добавляет новые колонки
+    и индексы, заполняет вычисляемые поля. Без этого сайт отвечает ошибкой (check_schema).
+    """
+    with app.app_context():
+        # Триграммные индексы поиска (models._trgm_index) требуют расширения pg_trgm
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(db.text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            db.session.commit()
+        db.create_all()
+        # create_all не трогает существующие таблицы — досоздаём новые колонки и индексы
+        _add_missing_columns()
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+        for name in DROPPED_INDEXES:
+            db.session.execute(db.text(f'DROP INDEX IF EXISTS "{name}"'))
+        db.session.commit()
+        _backfill_authors_cached()
+        _backfill_search_text()
+
+
+def _add_missing_columns():
+    """ALTER TABLE ... ADD COLUMN для колонок моделей, которых ещё нет в БД (все nullable)."""
+    _, columns = _missing_schema()
+    for column in columns:
+        table = column.table
+        col_type = column.type.compile(dialect=db.engine.dialect)
+        db.session.execute(db.text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'))
+        print(f"Добавлена колонка {table.name}.{column.name}")
+    db.session.commit()
+
+
+def _backfill_authors_cached(batch_size=500):
+    """Заполняет Article.authors_cached для статей, созданных до появления колонки.
+
+    Пачками по id, как _backfill_search_text.
+    """
+    last_id = 0
+    while True:
+        articles = (
+            Article.query
+            .filter(Article.authors_cached.is_(None), Article.id > last_id)
+            .options(db.selectinload(Article.authors))
+            .order_by(Article.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not articles:
+            break
+        for article in articles:
+            article.authors_cached = Article.format_authors(a.full_name for a in article.authors)
+        last_id = articles[-1].id
+        db.session.commit()
+        db.session.expunge_all()
+
+
+def _backfill_search_text(batch_size=500):
+    """Пересчитывает Article.search_text там, где он пуст или устарел.
+
+    Сверяется каждая статья, а не только NULL: после смены состава полей
+    (авторы, разделитель) старые значения обновляются тем же init-db.
+    Пачками по id — в памяти не больше batch_size статей с авторами.
+    """
+    last_id = 0
+    while True:
+        articles = (
+            Article.query
+            .filter(Article.id > last_id)
+            .options(db.undefer_group('abstracts'), db.selectinload(Article.authors))
+            .order_by(Article.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not articles:
+            break
+        for article in articles:
+            search_text = Article.build_search_text(
+                article.title, article.abstract, article.keywords, [a.full_name for a in article.authors],
+            )
+            if article.search_text != search_text:
+                article.search_text = search_text
+        last_id = articles[-1].id
+        db.session.commit()
+        db.session.expunge_all()
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Создать таблицы и индексы БД: flask --app app init-db"""
+    init_db()
+    print("БД инициализирована")
 
 
 # Jinja2 фильтры
@@ -121,6 +319,7 @@ def init_data():
 
 if __name__ == "__main__":
     print("Starting publisher site...")
+    init_db()
     init_data()
     print("Сервер стартует на http://127.0.0.1:5000")
     app.run(debug=True)
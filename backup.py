@@ -4,6 +4,53 @@ from datetime import datetime
 from pathlib import Path
 
 
+COPY_BUFFER_SIZE = 1024 * 1024  # 1 МБ
+BACKUP_PREFIX = 'publisher_backup_'
+BACKUP_TIMESTAMP_FORMAT = '%Y-%m-%d_%H-%M-%S'
+
+
+def _copy_file(src, dst):
+    """Копирует файл с метаданными (как shutil.copy2), но без мелкого буфера.
+
+    Сначала пробует os.copy_file_range (копирование в ядре, reflink на CoW/NFS),
+    если ФС/ОС не умеет — обычное копирование буфером 1 МБ.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        copied = False
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_BUFFER_SIZE):
+                    pass
+                copied = True
+            except OSError:
+                # EXDEV, ENOSYS и т.п. — начинаем заново обычным способом
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+
+        if not copied:
+            buf = bytearray(COPY_BUFFER_SIZE)
+            view = memoryview(buf)
+            while True:
+                n = fsrc.readinto(buf)
+                if not n:
+                    break
+                fdst.write(view[:n])
+
+    shutil.copystat(src, dst)
+
+
+def _backup_time(path):
+    """Время бэкапа: из имени publisher_backup_<время>.db, для прочих *.db — mtime.
+
+    stat() нужен только файлам с нестандартным именем (скопированным вручную, старым).
+    """
+    try:
+        return datetime.strptime(path.stem.removeprefix(BACKUP_PREFIX), BACKUP_TIMESTAMP_FORMAT)
+    except ValueError:
+        return datetime.fromtimestamp(path.stat().st_mtime)
+
+
 def create_backup():
     """Создаёт бэкап БД."""
     base_dir = Path(__file__).parent
@@ -16,15 +63,15 @@ def create_backup():
     backups_dir = base_dir / 'backups'
     backups_dir.mkdir(exist_ok=True)
 
-    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-    backup_name = f'publisher_backup_{timestamp}.db'
+    timestamp = datetime.now().strftime(BACKUP_TIMESTAMP_FORMAT)
+    backup_name = f'{BACKUP_PREFIX}{timestamp}.db'
     backup_path = backups_dir / backup_name
 
-    shutil.copy2(db_path, backup_path)
+    _copy_file(db_path, backup_path)
     print(f"Бэкап создан: {backup_name}")
 
-    # Удаляем старые бэкапы (оставляем последние 10)
-    backups = sorted(backups_dir.glob('*.db'), key=lambda f: f.stat().st_mtime, reverse=True)
+    # Удаляем старые бэкапы (оставляем последние 10) — все *.db, как и в списке админки
+    backups = sorted(backups_dir.glob('*.db'), key=_backup_time, reverse=True)
     for old_backup in backups[10:]:
         old_backup.unlink()
         print(f"Удалён старый бэкап: {old_backup.name}")
@@ -0,0 +1,24 @@
+"""Кэш приложения (Flask-Caching): фрагменты шаблонов, счётчики публичной части и админки."""
+from flask_caching import Cache, make_template_fragment_key
+
+
+cache = Cache()
+# Счётчики неудачных входов — отдельно: в общем кэше их вытесняли бы записи
+# /api/search (по одной на каждый ?q=) при чистке по порогу
+login_throttle = Cache(with_jinja2_ext=False)  # {% cache %} в шаблонах — только основной кэш
+
+# Фрагменты, зависящие от журналов/выпусков/статей ({% cache ..., 'имя' %})
+CONTENT_FRAGMENTS = ['index_page', 'journals_list', 'dashboard_journals']
+# Ключ счётчиков дашборда админки (routes_admin._dashboard_stats)
+DASHBOARD_STATS_KEY = 'admin_dashboard_stats'
+# Ключ счётчиков публичной части (routes_public._public_stats)
+PUBLIC_STATS_KEY = 'public_stats'
+
+
+def invalidate_content_cache():
+    """Сбрасывает закэшированный контент после изменений в админке."""
+    cache.delete_many(
+        *[make_template_fragment_key(name) for name in CONTENT_FRAGMENTS],
+        DASHBOARD_STATS_KEY,
+        PUBLIC_STATS_KEY,
+    )
@@ -55,9 +55,21 @@ echo "SECRET_KEY сгенерирован: ${SECRET_KEY:0:8}..."
 
 deactivate
 
-# --- 5. Создание systemd-сервиса ---
+# --- 5. Инициализация БД (до запуска сервиса — воркеры не создают схему) ---
 echo ""
-echo "[5/7] Создание systemd-сервиса..."
+echo "[5/7] Инициализация базы данных..."
+cd "$APP_DIR"
+source venv/bin/activate
+flask --app app init-db
+python3 -c "
+from app import init_data
+init_data()
+"
+deactivate
+
+# --- 6. Создание systemd-сервиса ---
+echo ""
+echo "[6/7] Создание systemd-сервиса..."
 
 cat > /etc/systemd/system/${APP_NAME}.service << SERVICEEOF
 [Unit]
@@ -70,6 +82,7 @@ Group=${APP_USER}
 WorkingDirectory=${APP_DIR}
 Environment="SECRET_KEY=${SECRET_KEY}"
 Environment="FLASK_DEBUG=0"
+Environment="BACKUPS_ACCEL_PREFIX=/protected-backups/"
 ExecStart=${APP_DIR}/venv/bin/gunicorn --workers 3 --bind 127.0.0.1:${PORT} --timeout 120 app:app
 Restart=always
 RestartSec=5
@@ -78,7 +91,7 @@ RestartSec=5
 WantedBy=multi-user.target
 SERVICEEOF
 
-# Права на папку проекта
+# Права на папку проекта (в т.ч. на созданную БД)
 chown -R ${APP_USER}:${APP_USER} ${APP_DIR}
 
 systemctl daemon-reload
@@ -87,9 +100,9 @@ systemctl start ${APP_NAME}
 
 echo "Gunicorn запущен на порту ${PORT}"
 
-# --- 6. Настройка Nginx ---
+# --- 7. Настройка Nginx ---
 echo ""
-echo "[6/7] Настройка Nginx..."
+echo "[7/7] Настройка Nginx..."
 
 cat > /etc/nginx/sites-available/${APP_NAME} << NGINXEOF
 server {
@@ -105,6 +118,12 @@ server {
         add_header Cache-Control "public, immutable";
     }
 
+    # Бэкапы БД — только по X-Accel-Redirect из админки (напрямую недоступны)
+    location /protected-backups/ {
+        internal;
+        alias ${APP_DIR}/backups/;
+    }
+
     # Всё остальное — проксируем в Gunicorn
     location / {
         proxy_pass http://127.0.0.1:${PORT};
@@ -125,22 +144,6 @@ nginx -t && systemctl restart nginx
 
 echo "Nginx настроен"
 
-# --- 7. Инициализация БД ---
-echo ""
-echo "[7/7] Инициализация базы данных..."
-cd "$APP_DIR"
-source venv/bin/activate
-python3 -c "
-from app import app, db, init_data
-with app.app_context():
-    db.create_all()
-    init_data()
-"
-deactivate
-
-# Возвращаем права после создания БД
-chown -R ${APP_USER}:${APP_USER} ${APP_DIR}
-
 # --- Готово! ---
 echo ""
 echo "============================================"
@@ -163,4 +166,10 @@ echo "  Полезные команды:"
 echo "    systemctl status ${APP_NAME}    — статус приложения"
 echo "    systemctl restart ${APP_NAME}   — перезапуск"
 echo "    journalctl -u ${APP_NAME} -f    — логи"
+echo ""
+echo "  Обновление кода (схема БД обновляется до перезапуска):"
+echo "    cd ${APP_DIR} && git pull"
+echo "    sudo -u ${APP_USER} venv/bin/pip install -r requirements.txt"
+echo "    sudo -u ${APP_USER} venv/bin/flask --app app init-db"
+echo "    systemctl restart ${APP_NAME}"
 echo "============================================"
@@ -14,7 +14,10 @@ New DB models:
   Article (id, issue_id, title, title_en, abstract, abstract_en, keywords, keywords_en,
            doi, pages_from, pages_to, pdf_file, is_published)
   ArticleAuthor (id, article_id, full_name, full_name_en, order)
+
+Journal, Issue and Article keep their legacy ids (journ_id, num_id, art_id).
 """
+import codecs
 import re
 import sys
 import html
@@ -23,33 +26,77 @@ SQL_FILE = "Old/_live.radiotec_main4.2292296.sql"
 
 # Try multiple encodings
 ENCODINGS_TO_TRY = ["utf-8", "cp1251", "cp866", "koi8-r", "latin1"]
+ENCODING_SNIFF_BYTES = 64 * 1024
+INSERT_BATCH_SIZE = 1000
+
+# One-shot import: trade durability for write speed on the import connection.
+# All of these are per-connection and reset when the connection is closed.
+SQLITE_IMPORT_PRAGMAS = [
+    "PRAGMA journal_mode=MEMORY",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-131072",
+    "PRAGMA locking_mode=EXCLUSIVE",
+]
 
 
 def detect_encoding():
-    """Detect the best encoding for the SQL file."""
+    """Detect the best encoding for the SQL file.
+
+    Reads the file in ENCODING_SNIFF_BYTES chunks until a candidate encoding
+    shows the test words: a mysqldump starts with ASCII DDL, so the Cyrillic
+    data may be far from the head. Falls back to utf-8 only at EOF.
+    """
     test_words = ["Радиотехника", "журнал", "статья", "научн"]
-    for enc in ENCODINGS_TO_TRY:
-        try:
-            with open(SQL_FILE, "r", encoding=enc, errors="strict") as f:
-                chunk = f.read(500000)
-                # Check if we can find known Russian words
-                found = sum(1 for w in test_words if w in chunk)
-                if found >= 2:
-                    print(f"Encoding detected: {enc} (found {found} test words)")
+    overlap = max(len(w) for w in test_words) - 1
+    # One incremental decoder per still-possible encoding: multibyte chars
+    # cut at a chunk boundary are not errors
+    decoders = {enc: codecs.getincrementaldecoder(enc)("strict") for enc in ENCODINGS_TO_TRY}
+    tails = dict.fromkeys(ENCODINGS_TO_TRY, "")
+    found = {enc: set() for enc in ENCODINGS_TO_TRY}
+    with open(SQL_FILE, "rb") as f:
+        while decoders:
+            raw = f.read(ENCODING_SNIFF_BYTES)
+            for enc in ENCODINGS_TO_TRY:
+                if enc not in decoders:
+                    continue
+                try:
+                    text = decoders[enc].decode(raw, final=not raw)
+                except (UnicodeDecodeError, UnicodeError):
+                    del decoders[enc]
+                    continue
+                # Keep the end of the previous chunk so a word split between chunks is found
+                window = tails[enc] + text
+                found[enc].update(w for w in test_words if w in window)
+                tails[enc] = window[-overlap:]
+                if len(found[enc]) >= 2:
+                    print(f"Encoding detected: {enc} (found {len(found[enc])} test words)")
                     return enc
-        except (UnicodeDecodeError, UnicodeError):
-            continue
+            if not raw:
+                break
     # Fallback
     print("Warning: Could not detect encoding, using utf-8 with replace")
     return "utf-8"
 
 
+_RE_VALUES = re.compile(r"VALUES\s*")
+# Quoted string (with \x and '' escapes) | row punctuation | bare value (NULL, numbers)
+_RE_VALUE_TOKEN = re.compile(r"'((?:[^'\\]|\\.?|'')*)'?|([(),])|([^'(),]+)", re.DOTALL)
+_RE_QUOTE_ESCAPE = re.compile(r"\\.?|''", re.DOTALL)
+
+
+def _unquote(match):
+    """'' -> ', backslash escapes are left for clean_val."""
+    text = match.group()
+    return "'" if text == "''" else text
+
+
 def parse_values(insert_line):
     """Parse MySQL INSERT VALUES into list of tuples.
     Handles: strings with escaped quotes, NULL, numbers, decimals.
     """
     # Find the VALUES part
-    m = re.search(r"VALUES\s*", insert_line)
+    m = _RE_VALUES.search(insert_line)
     if not m:
         return []
 
@@ -59,81 +106,50 @@ def parse_values(insert_line):
 
     rows = []
     current_row = []
-    current_val = ""
-    in_string = False
-    escape_next = False
+    current_val = []
     paren_depth = 0
 
-    i = 0
-    while i < len(data):
-        ch = data[i]
-
-        if escape_next:
-            current_val += ch
-            escape_next = False
-            i += 1
-            continue
-
-        if ch == "\\" and in_string:
-            escape_next = True
-            current_val += ch
-            i += 1
-            continue
-
-        if ch == "'" and not in_string:
-            in_string = True
-            i += 1
-            continue
-        elif ch == "'" and in_string:
-            # Check for ''
-            if i + 1 < len(data) and data[i + 1] == "'":
-                current_val += "'"
-                i += 2
-                continue
-            in_string = False
-            i += 1
-            continue
+    for token in _RE_VALUE_TOKEN.finditer(data):
+        string, punct, bare = token.groups()
 
-        if in_string:
-            current_val += ch
-            i += 1
-            continue
-
-        # Not in string
-        if ch == "(":
+        if string is not None:
+            if "''" in string:
+                string = _RE_QUOTE_ESCAPE.sub(_unquote, string)
+            current_val.append(string)
+        elif bare is not None:
+            current_val.append(bare)
+        elif punct == "(":
             paren_depth += 1
             if paren_depth == 1:
-                current_val = ""
-                i += 1
-                continue
-        elif ch == ")":
+                current_val = []
+        elif punct == ")":
             paren_depth -= 1
             if paren_depth == 0:
                 # End of row
-                current_row.append(current_val.strip())
+                current_row.append("".join(current_val).strip())
                 rows.append(tuple(current_row))
                 current_row = []
-                current_val = ""
-                i += 1
-                continue
-        elif ch == "," and paren_depth == 1:
-            current_row.append(current_val.strip())
-            current_val = ""
-            i += 1
-            continue
-        elif ch == "," and paren_depth == 0:
-            i += 1
-            continue
-        else:
-            current_val += ch
-            i += 1
-            continue
-
-        i += 1
+                current_val = []
+        elif paren_depth == 1:
+            current_row.append("".join(current_val).strip())
+            current_val = []
+        elif paren_depth > 1:
+            current_val.append(punct)
 
     return rows
 
 
+_RE_TAGS = re.compile(r"<[^>]+>")
+_RE_WS = re.compile(r"\s+")
+_RE_MYSQL_ESCAPE = re.compile(r"\\(.)", re.DOTALL)
+_MYSQL_ESCAPES = {"'": "'", '"': '"', "n": "\n", "r": "\r", "\\": "\\"}
+
+
+def _unescape_mysql(match):
+    """\\n -> newline etc.; unknown escapes are kept as is."""
+    return _MYSQL_ESCAPES.get(match.group(1), match.group(0))
+
+
 def clean_val(val):
     """Convert a parsed value: NULL -> None, numbers -> int/float, strings stay."""
     if val == "NULL" or val == "":
@@ -145,11 +161,12 @@ def clean_val(val):
         return int(val)
     except ValueError:
         pass
-    # Unescape MySQL
-    val = val.replace("\\'", "'").replace('\\"', '"').replace("\\n", "\n").replace("\\r", "\r")
-    val = val.replace("\\\\", "\\")
+    # Unescape MySQL (single pass, so "\\\\n" stays a backslash + "n")
+    if "\\" in val:
+        val = _RE_MYSQL_ESCAPE.sub(_unescape_mysql, val)
     # Clean HTML entities
-    val = html.unescape(val)
+    if "&" in val:
+        val = html.unescape(val)
     return val
 
 
@@ -157,57 +174,82 @@ def strip_html(text):
     """Remove HTML tags from text."""
     if not text:
         return text
-    text = re.sub(r"<[^>]+>", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    if "<" in text:
+        text = _RE_TAGS.sub(" ", text)
+    text = _RE_WS.sub(" ", text).strip()
     return text
 
 
-def extract_table_data(encoding, table_name):
-    """Extract all rows from INSERT statements for a table."""
-    marker = f"INSERT INTO `{table_name}`"
-    all_rows = []
-    with open(SQL_FILE, "r", encoding=encoding, errors="replace") as f:
+def extract_tables_data(encoding, table_names):
+    """Extract rows from INSERT statements for several tables in one pass over the dump.
+
+    The dump is read as bytes; only the matching INSERT lines are decoded
+    (all supported encodings are ASCII-compatible, so the marker is plain bytes).
+    """
+    marker = re.compile(
+        rb"INSERT INTO `(" + b"|".join(re.escape(name.encode()) for name in table_names) + rb")`"
+    )
+    tables = {name: [] for name in table_names}
+    with open(SQL_FILE, "rb", buffering=1 << 20) as f:
         for line in f:
-            if marker in line:
-                rows = parse_values(line)
-                all_rows.extend(rows)
-    return all_rows
+            m = marker.search(line)
+            if m:
+                text = line.decode(encoding, errors="replace")
+                tables[m.group(1).decode()].extend(parse_values(text))
+    return tables
+
+
+_SLUG_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    ' ': '-', '_': '-',
+})
+_RE_SLUG_DROP = re.compile(r"[^\w-]+")
+_RE_SLUG_DASHES = re.compile(r"-+")
 
 
 def slugify(text):
     """Transliterate and slugify Russian text."""
-    translit = {
-        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-        'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-        'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-        'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
-        'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-    }
-    text = text.lower().strip()
-    result = []
-    for ch in text:
-        if ch in translit:
-            result.append(translit[ch])
-        elif ch.isalnum():
-            result.append(ch)
-        elif ch in " -_":
-            result.append("-")
-    slug = re.sub(r"-+", "-", "".join(result)).strip("-")
+    text = text.lower().strip().translate(_SLUG_TRANSLIT)
+    slug = _RE_SLUG_DASHES.sub("-", _RE_SLUG_DROP.sub("", text)).strip("-")
     return slug or "journal"
 
 
+_RE_PAGES = re.compile(r"\s*(\d+)(?:\s*[-–—]\s*(\d+))?")
+
+
 def parse_pages(pages_str):
     """Parse pages string like '12-25' or '12' into (from, to)."""
     if not pages_str:
         return None, None
-    pages_str = str(pages_str).strip().replace("–", "-").replace("—", "-")
-    m = re.match(r"(\d+)\s*[-]\s*(\d+)", pages_str)
-    if m:
-        return int(m.group(1)), int(m.group(2))
-    m = re.match(r"(\d+)", pages_str)
-    if m:
-        return int(m.group(1)), None
-    return None, None
+    m = _RE_PAGES.match(str(pages_str))
+    if not m:
+        return None, None
+    return int(m.group(1)), (int(m.group(2)) if m.group(2) else None)
+
+
+def _bulk_insert(session, model, rows):
+    """Insert rows (with explicit ids) with Core executemany INSERTs of INSERT_BATCH_SIZE rows."""
+    stmt = model.__table__.insert()
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        session.execute(stmt, rows[start:start + INSERT_BATCH_SIZE])
+
+
+def _sync_id_sequences(session, models):
+    """PostgreSQL: move id sequences past the explicitly inserted legacy ids."""
+    from sqlalchemy import text
+
+    if session.get_bind().dialect.name != "postgresql":
+        return  # SQLite picks max(id) + 1 by itself
+    for model in models:
+        table = model.__tablename__
+        session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM \"{table}\"), 1))"
+        ))
 
 
 def run_migration():
@@ -218,21 +260,16 @@ def run_migration():
     # Detect encoding
     enc = detect_encoding()
 
-    # Extract data
-    print("\nExtracting journals...")
-    journals_raw = extract_table_data(enc, "journals")
+    # Extract data (single pass over the dump)
+    print("\nExtracting journals, nomera (issues), razdel_numbers (sections), articles...")
+    tables = extract_tables_data(enc, ["journals", "nomera", "razdel_numbers", "articles"])
+    journals_raw = tables["journals"]
+    nomera_raw = tables["nomera"]
+    razdel_raw = tables["razdel_numbers"]
+    articles_raw = tables["articles"]
     print(f"  Found {len(journals_raw)} journals")
-
-    print("Extracting nomera (issues)...")
-    nomera_raw = extract_table_data(enc, "nomera")
     print(f"  Found {len(nomera_raw)} issues")
-
-    print("Extracting razdel_numbers (sections)...")
-    razdel_raw = extract_table_data(enc, "razdel_numbers")
     print(f"  Found {len(razdel_raw)} sections")
-
-    print("Extracting articles...")
-    articles_raw = extract_table_data(enc, "articles")
     print(f"  Found {len(articles_raw)} articles")
 
     # Build lookup maps
@@ -266,11 +303,19 @@ def run_migration():
     print("\nImporting into new database...")
 
     # Import Flask app
-    from app import app, db
+    from sqlalchemy import text
+    from app import app, db, init_db
+    from cache import invalidate_content_cache
     from models import Journal, Issue, Article, ArticleAuthor, User
 
+    init_db()
     with app.app_context():
-        # Clear existing data if any
+        is_sqlite = db.engine.dialect.name == "sqlite"
+        if is_sqlite:
+            for pragma in SQLITE_IMPORT_PRAGMAS:
+                db.session.execute(text(pragma))
+
+        # Clear existing data if any (same transaction as the import)
         existing = Journal.query.count()
         if existing > 0:
             print(f"\nDatabase has {existing} journals. Clearing for re-import...")
@@ -278,7 +323,6 @@ def run_migration():
             Article.query.delete()
             Issue.query.delete()
             Journal.query.delete()
-            db.session.commit()
             print("Cleared existing data.")
 
         # Import journals
@@ -287,10 +331,12 @@ def run_migration():
         #   rospech(12), pochta(13), issn(14), cover(15), numbers(16), title(17),
         #   keywords(18), description(19), jr_active(20), ...many more fields...
         #   menu_name_eng(42?), journ_name_eng(44?), ...
-        old_to_new_journal = {}
-        journal_order = 0
+        # Legacy ids are kept as primary keys, so no old -> new id maps are needed
+        journal_rows = []
         for row in journals_raw:
             old_id = clean_val(row[0])
+            if old_id is None:
+                continue
             name = clean_val(row[3]) or clean_val(row[1]) or f"Journal {old_id}"
             name = strip_html(name)
             slug = clean_val(row[4])  # 'link' field used as slug
@@ -307,24 +353,25 @@ def run_migration():
             issn = clean_val(row[14])
             is_active = (clean_val(row[20]) == 1) if len(row) > 20 else True
 
-            journal = Journal(
-                name=name,
-                slug=slug,
-                issn=issn,
-                description=description,
-                editorial_board=strip_html(clean_val(row[7])) if len(row) > 7 else None,
-                is_active=is_active,
-                order=journal_order,
-            )
-            db.session.add(journal)
-            db.session.flush()
-            old_to_new_journal[old_id] = journal.id
-            journal_order += 1
-            print(f"  Journal: {name} (old_id={old_id} -> new_id={journal.id})")
+            journal_rows.append({
+                "id": old_id,
+                "name": name,
+                "slug": slug,
+                "issn": issn,
+                "description": description,
+                "editorial_board": strip_html(clean_val(row[7])) if len(row) > 7 else None,
+                "is_active": is_active,
+                "order": len(journal_rows),
+            })
+
+        # One executemany INSERT instead of add() + flush() per row
+        _bulk_insert(db.session, Journal, journal_rows)
+        journal_ids = {row["id"] for row in journal_rows}
+        for row in journal_rows:
+            print(f"  Journal: {row['name']} (id={row['id']})")
 
         # Import issues (nomera)
-        old_to_new_issue = {}
-        issue_count = 0
+        issue_rows = []
         for row in nomera_raw:
             num_id = clean_val(row[0])
             jr_num = clean_val(row[1])
@@ -332,8 +379,7 @@ def run_migration():
             num_num = clean_val(row[3])
             num_act = clean_val(row[5])
 
-            new_journal_id = old_to_new_journal.get(jr_num)
-            if not new_journal_id:
+            if num_id is None or jr_num not in journal_ids:
                 continue
 
             # Parse number (can be "5-6" or "1")
@@ -343,16 +389,17 @@ def run_migration():
             except (AttributeError, ValueError):
                 number_int = 1
 
-            issue = Issue(
-                journal_id=new_journal_id,
-                number=number_int,
-                year=num_year if num_year else 2000,
-                is_published=(num_act == 1),
-            )
-            db.session.add(issue)
-            db.session.flush()
-            old_to_new_issue[num_id] = issue.id
-            issue_count += 1
+            issue_rows.append({
+                "id": num_id,
+                "journal_id": jr_num,
+                "number": number_int,
+                "year": num_year if num_year else 2000,
+                "is_published": (num_act == 1),
+            })
+
+        _bulk_insert(db.session, Issue, issue_rows)
+        issue_ids = {row["id"] for row in issue_rows}
+        issue_count = len(issue_rows)
 
         print(f"  Imported {issue_count} issues")
 
@@ -363,8 +410,8 @@ def run_migration():
         #   article_type(13), udk(14), doi(15), citata(16), data_recieved(17),
         #   data_approved(18), data_accepted(19), citata_eng(20), rubr_vak(21),
         #   article_text(22), file(23), price(24)
-        article_count = 0
-        author_count = 0
+        article_rows = []
+        author_rows = []
         skipped = 0
 
         for row in articles_raw:
@@ -382,7 +429,7 @@ def run_migration():
             doi = clean_val(row[15]) if len(row) > 15 else None
             pdf_file = clean_val(row[23]) if len(row) > 23 else None
 
-            if not art_name:
+            if art_id is None or not art_name:
                 skipped += 1
                 continue
 
@@ -392,8 +439,7 @@ def run_migration():
                 skipped += 1
                 continue
 
-            new_issue_id = old_to_new_issue.get(nomer_id)
-            if new_issue_id is None:
+            if nomer_id not in issue_ids:
                 skipped += 1
                 continue
 
@@ -409,26 +455,25 @@ def run_migration():
             if descript_eng:
                 descript_eng = strip_html(descript_eng)
 
-            article = Article(
-                issue_id=new_issue_id,
-                title=art_name,
-                title_en=art_name_eng if art_name_eng else None,
-                abstract=descript if descript else None,
-                abstract_en=descript_eng if descript_eng else None,
-                keywords=keyword if keyword else None,
-                keywords_en=keyword_eng if keyword_eng else None,
-                doi=doi if doi else None,
-                pages_from=pages_from,
-                pages_to=pages_to,
-                pdf_file=pdf_file if pdf_file else None,
-                order=article_count,
-                is_published=True,
-            )
-            db.session.add(article)
-            db.session.flush()
-            article_count += 1
+            article_rows.append({
+                "id": art_id,
+                "issue_id": nomer_id,
+                "title": art_name,
+                "title_en": art_name_eng if art_name_eng else None,
+                "abstract": descript if descript else None,
+                "abstract_en": descript_eng if descript_eng else None,
+                "keywords": keyword if keyword else None,
+                "keywords_en": keyword_eng if keyword_eng else None,
+                "doi": doi if doi else None,
+                "pages_from": pages_from,
+                "pages_to": pages_to,
+                "pdf_file": pdf_file if pdf_file else None,
+                "order": len(article_rows),
+                "is_published": True,
+            })
 
             # Parse authors (comma-separated)
+            article_authors_start = len(author_rows)
             if authors_str:
                 authors_list = [a.strip() for a in authors_str.split(",") if a.strip()]
                 authors_eng_list = []
@@ -443,16 +488,28 @@ def run_migration():
                     if idx < len(authors_eng_list):
                         eng_name = strip_html(authors_eng_list[idx])
 
-                    author = ArticleAuthor(
-                        article_id=article.id,
-                        full_name=author_name,
-                        full_name_en=eng_name,
-                        order=idx,
-                    )
-                    db.session.add(author)
-                    author_count += 1
+                    author_rows.append({
+                        "article_id": art_id,
+                        "full_name": author_name,
+                        "full_name_en": eng_name,
+                        "order": idx,
+                    })
+            article_author_names = [author["full_name"] for author in author_rows[article_authors_start:]]
+            article_rows[-1]["authors_cached"] = Article.format_authors(article_author_names)
+            article_rows[-1]["search_text"] = Article.build_search_text(
+                art_name, descript, keyword, article_author_names
+            )
+
+        _bulk_insert(db.session, Article, article_rows)
+        _bulk_insert(db.session, ArticleAuthor, author_rows)
+        _sync_id_sequences(db.session, [Journal, Issue, Article])
 
         db.session.commit()
+        if is_sqlite:
+            # Close the tuned connection: restores default pragmas, drops the exclusive lock
+            db.engine.dispose()
+        # Running workers share the FileSystemCache: drop fragments and counters built from the old data
+        invalidate_content_cache()
 
         print(f"\n{'=' * 60}")
         print(f"MIGRATION COMPLETE!")
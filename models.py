@@ -1,3 +1,5 @@
+import functools
+import re
 from datetime import datetime, timezone
 
 from flask_sqlalchemy import SQLAlchemy
@@ -13,6 +15,53 @@ def _utcnow():
     return datetime.now(timezone.utc)
 
 
+def _trgm_index(name, column):
+    """Триграммный GIN-индекс для поиска LIKE/ILIKE '%...%' — только PostgreSQL (pg_trgm)."""
+    return db.Index(
+        name, column,
+        postgresql_using='gin',
+        postgresql_ops={column: 'gin_trgm_ops'},
+    ).ddl_if(dialect='postgresql')
+
+
+# Замены после lower() для normalize_text — одним проходом str.translate
+_NORM_TABLE = str.maketrans({
+    'ё': 'е',
+    '’': "'", '‘': "'", 'ʼ': "'", '`': "'",  # варианты апострофа
+})
+
+
+def normalize_text(text):
+    """Нормализация текста для поиска."""
+    if not text:
+        return ""
+    return text.lower().translate(_NORM_TABLE)
+
+
+# Явные признаки мусора (должность, аффилиация, e-mail) для Article._looks_like_name
+_NAME_BLACKLIST_RE = re.compile(
+    r'кафедр|универси|институт|факультет|лаборатор'
+    r'|отдел|e-?mail|mail\.ru|yandex'
+    r'|сотрудник|начальник|директор|заведующ'
+    r'|академи|доцент|профессор'
+    r'|органической|технической|государствен',
+    re.IGNORECASE,
+)
+# Паттерны ФИО (русское или латиница) для Article._looks_like_name — одной регуляркой
+_NAME_RE = re.compile(
+    r'[А-ЯЁ][а-яё]+\s+[А-ЯЁ]\.'
+    r'|[А-ЯЁ]\.\s?[А-ЯЁ]?\.?\s?[А-ЯЁ][а-яё]+'
+    r'|[A-Z][a-z]+\s+[A-Z]\.'
+    r'|[A-Z]\.\s?[A-Z]?\.?\s?[A-Z][a-z]+'
+)
+# Хвост из цифр-индексов, пробелов (вкл. неразрывные), дефисов, суперскриптов
+# для Article._clean_name — снимается str.rstrip, без регулярки
+_NAME_TRAIL_CHARS = (
+    '0123456789−–⁰¹²³⁴⁵⁶⁷⁸⁹'
+    + ''.join(c for c in map(chr, range(0x3001)) if c.isspace())
+)
+
+
 # =============================================
 #   ПОЛЬЗОВАТЕЛИ (админы CMS)
 # =============================================
@@ -63,8 +112,17 @@ class Journal(db.Model):
 #   ВЫПУСКИ
 # =============================================
 class Issue(db.Model):
+    __table_args__ = (
+        db.Index('ix_issue_journal_year_number', 'journal_id', 'year', 'number'),
+        # Последние опубликованные выпуски всех журналов (главная): ORDER BY year DESC,
+        # number DESC LIMIT — обратный проход по частичному индексу, без сортировки
+        db.Index('ix_issue_published_year_number', 'year', 'number',
+                 postgresql_where=db.text('is_published'),
+                 sqlite_where=db.text('is_published = 1')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    journal_id = db.Column(db.Integer, db.ForeignKey('journal.id'), nullable=False, index=True)
+    journal_id = db.Column(db.Integer, db.ForeignKey('journal.id'), nullable=False)  # индекс — ix_issue_journal_year_number
     volume = db.Column(db.Integer)  # том
     number = db.Column(db.Integer, nullable=False)  # номер
     year = db.Column(db.Integer, nullable=False)
@@ -82,14 +140,30 @@ class Issue(db.Model):
 #   СТАТЬИ
 # =============================================
 class Article(db.Model):
+    __table_args__ = (
+        db.Index('ix_article_issue_order', 'issue_id', 'order'),
+        # Свежие опубликованные статьи (избранная на главной, поиск): ORDER BY id DESC LIMIT
+        db.Index('ix_article_published_id', 'id',
+                 postgresql_where=db.text('is_published'),
+                 sqlite_where=db.text('is_published = 1')),
+        _trgm_index('ix_article_search_text_trgm', 'search_text'),
+        # Статьи без search_text (до init-db) — запасная ветка поиска; индекс почти всегда пуст,
+        # но позволяет планировщику объединить обе ветки OR по индексам, без полного прохода
+        db.Index('ix_article_search_text_missing', 'id',
+                 postgresql_where=db.text('search_text IS NULL'),
+                 sqlite_where=db.text('search_text IS NULL')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    issue_id = db.Column(db.Integer, db.ForeignKey('issue.id'), nullable=False, index=True)
+    issue_id = db.Column(db.Integer, db.ForeignKey('issue.id'), nullable=False)  # индекс — ix_article_issue_order
 
     # Основные данные
     title = db.Column(db.String(500), nullable=False)
     title_en = db.Column(db.String(500))  # название на английском
-    abstract = db.Column(db.Text)  # аннотация
-    abstract_en = db.Column(db.Text)  # аннотация на английском
+    # Аннотации нужны только на странице статьи и в поиске — грузятся отдельно
+    # (undefer_group('abstracts') там, где выводятся)
+    abstract = db.deferred(db.Column(db.Text), group='abstracts')  # аннотация
+    abstract_en = db.deferred(db.Column(db.Text), group='abstracts')  # аннотация на английском
     keywords = db.Column(db.String(500))  # ключевые слова (через запятую)
     keywords_en = db.Column(db.String(500))  # ключевые слова EN
 
@@ -103,6 +177,8 @@ class Article(db.Model):
     pdf_file = db.Column(db.String(500))  # PDF статьи
 
     # Метаданные
+    authors_cached = db.Column(db.Text)  # готовая authors_str, пересчитывается при сохранении авторов
+    search_text = db.Column(db.Text)  # normalize_text(название + аннотация + ключевые слова + авторы), см. build_search_text
     order = db.Column(db.Integer, default=0)  # порядок в выпуске
     is_published = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=_utcnow)
@@ -111,30 +187,23 @@ class Article(db.Model):
     authors = db.relationship('ArticleAuthor', backref='article', cascade='all, delete-orphan',
                               order_by='ArticleAuthor.order')
 
+    # Имена авторов сильно повторяются между статьями — кэшируем результат по строке
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def _looks_like_name(text):
         """Проверяет, похожа ли строка на ФИО (а не должность/аффилиацию)."""
-        import re
         t = text.strip()
         if not t or len(t) > 40:
             return False
+        # E-mail — дешёвая проверка до регулярок (цифры не отсекаем: индексы
+        # в конце имени снимает _clean_name)
+        if '@' in t:
+            return False
         # Содержит явные признаки мусора
-        if any(w in t.lower() for w in [
-            'кафедр', 'универси', 'институт', 'факультет', 'лаборатор',
-            'отдел', 'e-mail', 'email', 'mail.ru', 'yandex',
-            'сотрудник', 'начальник', 'директор', 'заведующ',
-            'академи', 'доцент', 'профессор',
-            'органической', 'технической', 'государствен',
-        ]):
+        if _NAME_BLACKLIST_RE.search(t):
             return False
         # Содержит паттерн ФИО (русское или латиница)
-        if re.search(r'[А-ЯЁ][а-яё]+\s+[А-ЯЁ]\.', t):
-            return True
-        if re.search(r'[А-ЯЁ]\.\s?[А-ЯЁ]?\.?\s?[А-ЯЁ][а-яё]+', t):
-            return True
-        if re.search(r'[A-Z][a-z]+\s+[A-Z]\.', t):
-            return True
-        if re.search(r'[A-Z]\.\s?[A-Z]?\.?\s?[A-Z][a-z]+', t):
+        if _NAME_RE.search(t):
             return True
         # Короткое (<=25) из 2-3 слов, все с заглавной — вероятно имя
         words = t.split()
@@ -143,34 +212,67 @@ class Article(db.Model):
         return False
 
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def _clean_name(text):
         """Убирает цифры-индексы из конца имени."""
-        import re
-        # Убираем trailing цифры, пробелы, дефисы, суперскрипты
-        return re.sub(r'[\s\d\−\–⁰¹²³⁴⁵⁶⁷⁸⁹]+$', '', text).strip()
+        return text.rstrip(_NAME_TRAIL_CHARS).strip()
 
-    @property
+    @classmethod
+    def format_authors(cls, full_names):
+        """Имена авторов через запятую (только ФИО, без должностей)."""
+        looks, clean = cls._looks_like_name, cls._clean_name
+        return ', '.join(clean(n) for n in full_names if looks(n))
+
+    @staticmethod
+    def build_search_text(title, abstract, keywords, author_names=()):
+        """Значение search_text: поиск идёт одним LIKE по нему вместо ILIKE по каждому полю.
+
+        ФИО авторов входят сюда же — ё/е и регистр в них сравниваются так же, как в тексте.
+        Поля разделены переводом строки: запрос поиска его не содержит, поэтому
+        не совпадёт «через границу» (конец названия + начало аннотации).
+        """
+        return normalize_text('\n'.join(filter(None, (title, abstract, keywords, *author_names))))
+
+    @functools.cached_property
     def authors_str(self):
-        """Строка с именами авторов через запятую (только ФИО, без должностей)."""
-        names = [self._clean_name(a.full_name) for a in self.authors if self._looks_like_name(a.full_name)]
-        return ', '.join(names) if names else ''
+        """Строка с именами авторов через запятую (только ФИО, без должностей).
 
-    @property
-    def pages_str(self):
+        Берётся из authors_cached; для старых строк без него — считается по авторам.
+        Кэшируется на экземпляре; после изменения авторов сбросить:
+        article.__dict__.pop('authors_str', None).
+        """
+        if self.authors_cached is not None:
+            return self.authors_cached
+        return self.format_authors(a.full_name for a in self.authors)
+
+    @staticmethod
+    def format_pages(pages_from, pages_to):
         """Строка со страницами: '12-25' или ''."""
-        if self.pages_from and self.pages_to:
-            return f'{self.pages_from}–{self.pages_to}'
-        elif self.pages_from:
-            return str(self.pages_from)
+        if pages_from and pages_to:
+            return f'{pages_from}–{pages_to}'
+        elif pages_from:
+            return str(pages_from)
         return ''
 
+    @functools.cached_property
+    def pages_str(self):
+        """Строка со страницами: '12-25' или ''.
+
+        Кэшируется на экземпляре, как authors_str.
+        """
+        return self.format_pages(self.pages_from, self.pages_to)
+
 
 # =============================================
 #   АВТОРЫ СТАТЕЙ
 # =============================================
 class ArticleAuthor(db.Model):
+    __table_args__ = (
+        db.Index('ix_article_author_article_order', 'article_id', 'order'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    article_id = db.Column(db.Integer, db.ForeignKey('article.id'), nullable=False, index=True)
+    article_id = db.Column(db.Integer, db.ForeignKey('article.id'), nullable=False)  # индекс — ix_article_author_article_order
 
     full_name = db.Column(db.String(200), nullable=False)
     full_name_en = db.Column(db.String(200))  # ФИО на английском
@@ -1,21 +1,36 @@
 import json
 import os
 import re
+import secrets
 from datetime import datetime, timezone
 from functools import wraps
 
 from flask import (
-    render_template, request, jsonify, redirect,
-    url_for, flash, current_app, send_file,
+    render_template, request, jsonify, redirect, abort,
+    url_for, flash, current_app, send_file, Response,
 )
 from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 
+from cache import cache, login_throttle, invalidate_content_cache, DASHBOARD_STATS_KEY
 from models import db, User, Journal, Issue, Article, ArticleAuthor
 
 
-ALLOWED_IMAGE = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'svg'}
-ALLOWED_PDF = {'pdf'}
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKUPS_DIR = os.path.join(BASE_DIR, 'backups')
+DB_PATH = os.path.join(BASE_DIR, 'instance', 'publisher.db')
+
+ALLOWED_IMAGE = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg')  # кортежи — для str.endswith
+ALLOWED_PDF = ('.pdf',)
+UPLOAD_TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S_'  # префикс имени загруженного файла
+UPLOAD_BUFFER_SIZE = 1024 * 1024  # копирование загрузки на диск блоками по 1 МБ
+LOGIN_MAX_FAILURES = 5  # неудачных входов с одного IP...
+LOGIN_FAILURE_WINDOW = 60  # ...за столько секунд (с последней неудачи)
+# Хэш случайного пароля: проверяется при неизвестном логине, чтобы ответ
+# занимал столько же времени, сколько при неверном пароле
+_DUMMY_PASSWORD_HASH = generate_password_hash(secrets.token_hex(16))
 
 
 def pluralize_ru(number, form1, form2, form5):
@@ -32,32 +47,30 @@ def pluralize_ru(number, form1, form2, form5):
 
 
 def allowed_image(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE
+    return filename.lower().endswith(ALLOWED_IMAGE)
 
 
 def allowed_pdf(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_PDF
+    return filename.lower().endswith(ALLOWED_PDF)
+
+
+# Транслитерация для slugify: пробел и '_' сразу в '-'
+_SLUG_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    ' ': '-', '_': '-',
+})
+_RE_SLUG_DROP = re.compile(r'[^\w-]+')
+_RE_SLUG_DASHES = re.compile(r'-+')
 
 
 def slugify(text):
     """Простая транслитерация + slugify для русского текста."""
-    translit_map = {
-        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-        'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-        'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-        'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
-        'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-    }
-    text = text.lower().strip()
-    result = []
-    for char in text:
-        if char in translit_map:
-            result.append(translit_map[char])
-        elif char.isalnum():
-            result.append(char)
-        elif char in (' ', '-', '_'):
-            result.append('-')
-    slug = re.sub(r'-+', '-', ''.join(result)).strip('-')
+    text = text.lower().strip().translate(_SLUG_TRANSLIT)
+    slug = _RE_SLUG_DASHES.sub('-', _RE_SLUG_DROP.sub('', text)).strip('-')
     return slug or 'journal'
 
 
@@ -71,12 +84,16 @@ def admin_required(f):
     return decorated
 
 
+def _timestamped_name(original):
+    """Безопасное имя загружаемого файла с префиксом-временем."""
+    return secure_filename(datetime.now().strftime(UPLOAD_TIMESTAMP_FORMAT) + original)
+
+
 def _save_image(file, upload_folder):
     """Сохраняет изображение, возвращает имя файла."""
     if file and file.filename and allowed_image(file.filename):
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-        filename = secure_filename(timestamp + file.filename)
-        file.save(os.path.join(upload_folder, filename))
+        filename = _timestamped_name(file.filename)
+        file.save(os.path.join(upload_folder, filename), buffer_size=UPLOAD_BUFFER_SIZE)
         return filename
     return None
 
@@ -84,13 +101,158 @@ def _save_image(file, upload_folder):
 def _save_pdf(file, upload_folder):
     """Сохраняет PDF, возвращает имя файла."""
     if file and file.filename and allowed_pdf(file.filename):
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-        filename = secure_filename(timestamp + file.filename)
-        file.save(os.path.join(upload_folder, filename))
+        filename = _timestamped_name(file.filename)
+        file.save(os.path.join(upload_folder, filename), buffer_size=UPLOAD_BUFFER_SIZE)
         return filename
     return None
 
 
+@cache.cached(timeout=60, key_prefix=DASHBOARD_STATS_KEY)
+def _dashboard_stats():
+    """Счётчики и предупреждения для дашборда (кэш на минуту, сброс — invalidate_content_cache)."""
+    # Основная статистика — один агрегирующий запрос на таблицу.
+    # count() не считает NULL: nullif(col, '') отсекает и пустые строки
+    journals_total, journals_active = db.session.query(
+        db.func.count(Journal.id),
+        db.func.count(db.case((Journal.is_active == True, 1))),
+    ).one()
+    issues_total, issues_published = db.session.query(
+        db.func.count(Issue.id),
+        db.func.count(db.case((Issue.is_published == True, 1))),
+    ).one()
+    issues_draft = issues_total - issues_published
+    articles_total, articles_with_pdf, articles_with_doi, articles_with_abstract = db.session.query(
+        db.func.count(Article.id),
+        db.func.count(db.func.nullif(Article.pdf_file, '')),
+        db.func.count(db.func.nullif(Article.doi, '')),
+        db.func.count(db.func.nullif(Article.abstract, '')),
+    ).one()
+
+    stats = {
+        'journals_total': journals_total,
+        'journals_active': journals_active,
+        'issues_total': issues_total,
+        'issues_published': issues_published,
+        'issues_draft': issues_draft,
+        'articles_total': articles_total,
+        'articles_with_pdf': articles_with_pdf,
+        'articles_with_doi': articles_with_doi,
+    }
+
+    # Предупреждения о контенте
+    warnings = []
+    articles_no_pdf = articles_total - articles_with_pdf
+    if articles_no_pdf:
+        warnings.append({
+            'type': 'warning',
+            'message': f'{articles_no_pdf} {pluralize_ru(articles_no_pdf, "статья", "статьи", "статей")} без PDF-файла',
+        })
+
+    articles_no_abstract = articles_total - articles_with_abstract
+    if articles_no_abstract:
+        warnings.append({
+            'type': 'info',
+            'message': f'{articles_no_abstract} {pluralize_ru(articles_no_abstract, "статья", "статьи", "статей")} без аннотации',
+        })
+
+    articles_no_doi = articles_total - articles_with_doi
+    if articles_no_doi:
+        warnings.append({
+            'type': 'info',
+            'message': f'{articles_no_doi} {pluralize_ru(articles_no_doi, "статья", "статьи", "статей")} без DOI',
+        })
+
+    empty_issues = (
+        db.session.query(db.func.count(Issue.id))
+        .outerjoin(Issue.articles)
+        .filter(Article.id.is_(None))
+        .scalar()
+    )
+    if empty_issues:
+        warnings.append({
+            'type': 'warning',
+            'message': f'{empty_issues} {pluralize_ru(empty_issues, "выпуск", "выпуска", "выпусков")} без статей',
+        })
+
+    if issues_draft:
+        warnings.append({
+            'type': 'info',
+            'message': f'{issues_draft} {pluralize_ru(issues_draft, "выпуск", "выпуска", "выпусков")} в черновиках (не опубликованы)',
+        })
+
+    return stats, warnings
+
+
+def _journal_summaries():
+    """Сводка по журналам для дашборда — счётчики через GROUP BY, без загрузки выпусков и статей.
+
+    Вызывается из шаблона внутри {% cache %}: при попадании в кэш запросы не выполняются.
+    """
+    journal_rows = (
+        db.session.query(
+            Journal,
+            db.func.count(db.distinct(Issue.id)),
+            db.func.count(db.distinct(db.case((Issue.is_published == True, Issue.id)))),
+            db.func.count(Article.id),
+        )
+        .outerjoin(Journal.issues)
+        .outerjoin(Issue.articles)
+        .group_by(Journal.id)
+        .order_by(Journal.order, Journal.name)
+        .all()
+    )
+    # Последний выпуск каждого журнала (в порядке Journal.issues)
+    issue_rank = (
+        db.select(
+            Issue.id,
+            db.func.row_number().over(
+                partition_by=Issue.journal_id,
+                order_by=(Issue.year.desc(), Issue.number.desc()),
+            ).label('rank'),
+        )
+        .subquery()
+    )
+    latest_issues = {
+        issue.journal_id: issue
+        for issue in Issue.query.join(issue_rank, Issue.id == issue_rank.c.id).filter(issue_rank.c.rank == 1)
+    }
+    journal_summaries = []
+    for j, total_issues, published_issues, total_articles in journal_rows:
+        latest_issue = latest_issues.get(j.id)
+        journal_summaries.append({
+            'journal': j,
+            'total_issues': total_issues,
+            'published_issues': published_issues,
+            'total_articles': total_articles,
+            'latest_issue': latest_issue,
+        })
+    return journal_summaries
+
+
+def _toggle_flag(column, object_id):
+    """Инвертирует булев флаг строки одним UPDATE (с RETURNING, где поддерживается).
+
+    Возвращает новое значение; 404, если строки нет.
+    """
+    model = column.class_
+    stmt = (
+        db.update(model)
+        .where(model.id == object_id)
+        .values({column: db.not_(db.func.coalesce(column, False))})
+    )
+    if db.engine.dialect.update_returning:
+        new_value = db.session.execute(stmt.returning(column)).scalar_one_or_none()
+    elif db.session.execute(stmt).rowcount:
+        # SQLite < 3.35 — без RETURNING, читаем значение отдельно
+        new_value = db.session.execute(db.select(column).where(model.id == object_id)).scalar_one()
+    else:
+        new_value = None
+    if new_value is None:
+        abort(404)
+    db.session.commit()
+    return new_value
+
+
 def register_admin_routes(app):
     """Маршруты админ-панели (CMS)."""
 
@@ -101,12 +263,27 @@ def register_admin_routes(app):
         if current_user.is_authenticated:
             return redirect(next_url)
         if request.method == 'POST':
+            # Неудачные попытки считаем по IP в общем для воркеров кэше — перебор
+            # паролей не грузит воркеры хэшированием
+            fail_key = f'login_fail:{request.remote_addr}'
+            failures = login_throttle.get(fail_key) or 0
+            if failures >= LOGIN_MAX_FAILURES:
+                flash('Слишком много попыток входа, попробуйте через минуту', 'error')
+                return render_template('admin/login.html', next_url=next_url), 429
+
             username = request.form.get('username', '').strip()
             password = request.form.get('password', '')
             user = User.query.filter_by(username=username).first()
-            if user and user.is_active_user and user.check_password(password):
+            # Хэш считается всегда — по времени ответа не узнать, есть ли такой логин
+            if user:
+                password_ok = user.check_password(password)
+            else:
+                password_ok = check_password_hash(_DUMMY_PASSWORD_HASH, password)
+            if user and user.is_active_user and password_ok:
+                login_throttle.delete(fail_key)
                 login_user(user, remember=True)
                 return redirect(next_url)
+            login_throttle.set(fail_key, failures + 1, timeout=LOGIN_FAILURE_WINDOW)
             flash('Неверный логин или пароль', 'error')
         return render_template('admin/login.html', next_url=next_url)
 
@@ -121,96 +298,17 @@ def register_admin_routes(app):
     @app.route('/admin/dashboard')
     @admin_required
     def admin_dashboard():
-        # Основная статистика
-        journals_total = Journal.query.count()
-        journals_active = Journal.query.filter_by(is_active=True).count()
-        issues_total = Issue.query.count()
-        issues_published = Issue.query.filter_by(is_published=True).count()
-        issues_draft = issues_total - issues_published
-        articles_total = Article.query.count()
-        articles_with_pdf = Article.query.filter(Article.pdf_file.isnot(None), Article.pdf_file != '').count()
-        articles_with_doi = Article.query.filter(Article.doi.isnot(None), Article.doi != '').count()
-        users_total = User.query.count()
-
-        stats = {
-            'journals_total': journals_total,
-            'journals_active': journals_active,
-            'issues_total': issues_total,
-            'issues_published': issues_published,
-            'issues_draft': issues_draft,
-            'articles_total': articles_total,
-            'articles_with_pdf': articles_with_pdf,
-            'articles_with_doi': articles_with_doi,
-            'users_total': users_total,
-        }
-
-        # Сводка по журналам
-        journals = (
-            Journal.query
-            .options(db.subqueryload(Journal.issues).subqueryload(Issue.articles))
-            .order_by(Journal.order, Journal.name)
-            .all()
-        )
-        journal_summaries = []
-        for j in journals:
-            total_issues = len(j.issues)
-            published_issues = sum(1 for i in j.issues if i.is_published)
-            total_articles = sum(len(i.articles) for i in j.issues)
-            latest_issue = j.issues[0] if j.issues else None
-            journal_summaries.append({
-                'journal': j,
-                'total_issues': total_issues,
-                'published_issues': published_issues,
-                'total_articles': total_articles,
-                'latest_issue': latest_issue,
-            })
-
-        # Предупреждения о контенте
-        warnings = []
-        articles_no_pdf = Article.query.filter(
-            db.or_(Article.pdf_file.is_(None), Article.pdf_file == '')
-        ).count()
-        if articles_no_pdf:
-            warnings.append({
-                'type': 'warning',
-                'message': f'{articles_no_pdf} {pluralize_ru(articles_no_pdf, "статья", "статьи", "статей")} без PDF-файла',
-            })
-
-        articles_no_abstract = Article.query.filter(
-            db.or_(Article.abstract.is_(None), Article.abstract == '')
-        ).count()
-        if articles_no_abstract:
-            warnings.append({
-                'type': 'info',
-                'message': f'{articles_no_abstract} {pluralize_ru(articles_no_abstract, "статья", "статьи", "статей")} без аннотации',
-            })
-
-        articles_no_doi = articles_total - articles_with_doi
-        if articles_no_doi:
-            warnings.append({
-                'type': 'info',
-                'message': f'{articles_no_doi} {pluralize_ru(articles_no_doi, "статья", "статьи", "статей")} без DOI',
-            })
-
-        empty_issues = Issue.query.filter(~Issue.articles.any()).count()
-        if empty_issues:
-            warnings.append({
-                'type': 'warning',
-                'message': f'{empty_issues} {pluralize_ru(empty_issues, "выпуск", "выпуска", "выпусков")} без статей',
-            })
-
-        if issues_draft:
-            warnings.append({
-                'type': 'info',
-                'message': f'{issues_draft} {pluralize_ru(issues_draft, "выпуск", "выпуска", "выпусков")} в черновиках (не опубликованы)',
-            })
+        stats, warnings = _dashboard_stats()
+        stats = dict(stats, users_total=User.query.count())
 
         # Последние статьи
+        # Только колонки, которые выводит шаблон (authors_str — из authors_cached)
         recent_articles = (
             Article.query
             .options(
-                db.joinedload(Article.issue).joinedload(Issue.journal),
-                db.joinedload(Article.authors)
+                db.load_only(Article.title, Article.authors_cached, Article.pdf_file, Article.is_published),
+                db.joinedload(Article.issue).load_only(Issue.number, Issue.year)
+                .joinedload(Issue.journal).load_only(Journal.name),
             )
             .order_by(Article.id.desc())
             .limit(10)
@@ -220,7 +318,7 @@ def register_admin_routes(app):
         return render_template(
             'admin/dashboard.html',
             stats=stats,
-            journal_summaries=journal_summaries,
+            load_journal_summaries=_journal_summaries,
             warnings=warnings,
             recent_articles=recent_articles,
         )
@@ -243,11 +341,6 @@ def register_admin_routes(app):
 
             slug = request.form.get('slug', '').strip() or slugify(name)
 
-            # Уникальность slug
-            existing = Journal.query.filter_by(slug=slug).first()
-            if existing:
-                slug = slug + '-' + str(Journal.query.count() + 1)
-
             journal = Journal(
                 name=name,
                 slug=slug,
@@ -267,7 +360,15 @@ def register_admin_routes(app):
                 journal.cover_image = saved
 
             db.session.add(journal)
-            db.session.commit()
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Уникальность slug держит индекс БД; если занят — добавляем суффикс
+                db.session.rollback()
+                journal.slug = f'{slug}-{secrets.token_hex(3)}'
+                db.session.add(journal)
+                db.session.commit()
+            invalidate_content_cache()
             flash(f'Журнал «{journal.name}» создан', 'success')
             return redirect(url_for('admin_journals'))
 
@@ -299,6 +400,7 @@ def register_admin_routes(app):
                 journal.cover_image = None
 
             db.session.commit()
+            invalidate_content_cache()
             flash('Журнал обновлён', 'success')
             return redirect(url_for('admin_journals'))
 
@@ -307,10 +409,9 @@ def register_admin_routes(app):
     @app.route('/admin/journals/<int:journal_id>/toggle-active', methods=['POST'])
     @admin_required
     def admin_journal_toggle_active(journal_id):
-        journal = Journal.query.get_or_404(journal_id)
-        journal.is_active = not journal.is_active
-        db.session.commit()
-        return jsonify({'success': True, 'is_active': journal.is_active})
+        is_active = _toggle_flag(Journal.is_active, journal_id)
+        invalidate_content_cache()
+        return jsonify({'success': True, 'is_active': is_active})
 
     @app.route('/admin/journals/<int:journal_id>/delete', methods=['POST'])
     @admin_required
@@ -321,6 +422,7 @@ def register_admin_routes(app):
             return jsonify({'success': False, 'error': f'Сначала удалите все выпуски ({issue_count})'}), 400
         db.session.delete(journal)
         db.session.commit()
+        invalidate_content_cache()
         flash(f'Журнал «{journal.name}» удалён', 'success')
         return jsonify({'success': True})
 
@@ -332,7 +434,7 @@ def register_admin_routes(app):
         issues = (
             Issue.query
             .filter_by(journal_id=journal_id)
-            .options(db.subqueryload(Issue.articles))
+            .options(db.selectinload(Issue.articles))
             .order_by(Issue.year.desc(), Issue.number.desc())
             .all()
         )
@@ -361,6 +463,7 @@ def register_admin_routes(app):
 
             db.session.add(issue)
             db.session.commit()
+            invalidate_content_cache()
             flash(f'Выпуск №{issue.number}/{issue.year} создан', 'success')
             return redirect(url_for('admin_issues', journal_id=journal_id))
 
@@ -389,6 +492,7 @@ def register_admin_routes(app):
                 issue.cover_image = None
 
             db.session.commit()
+            invalidate_content_cache()
             flash('Выпуск обновлён', 'success')
             return redirect(url_for('admin_issues', journal_id=journal.id))
 
@@ -401,16 +505,16 @@ def register_admin_routes(app):
         journal_id = issue.journal_id
         db.session.delete(issue)
         db.session.commit()
+        invalidate_content_cache()
         flash(f'Выпуск №{issue.number}/{issue.year} удалён', 'success')
         return jsonify({'success': True, 'redirect': url_for('admin_issues', journal_id=journal_id)})
 
     @app.route('/admin/issues/<int:issue_id>/toggle-published', methods=['POST'])
     @admin_required
     def admin_issue_toggle_published(issue_id):
-        issue = Issue.query.get_or_404(issue_id)
-        issue.is_published = not issue.is_published
-        db.session.commit()
-        return jsonify({'success': True, 'is_published': issue.is_published})
+        is_published = _toggle_flag(Issue.is_published, issue_id)
+        invalidate_content_cache()
+        return jsonify({'success': True, 'is_published': is_published})
 
     # ==================== СТАТЬИ ====================
     @app.route('/admin/issues/<int:issue_id>/articles/add', methods=['GET', 'POST'])
@@ -433,6 +537,12 @@ def register_admin_routes(app):
                 pages_to=int(request.form.get('pages_to') or 0) or None,
                 language=request.form.get('language', 'ru'),
                 is_published=('is_published' in request.form),
+                # Порядок — в конец; считается подзапросом прямо в INSERT
+                order=(
+                    db.select(db.func.coalesce(db.func.max(Article.order), 0) + 1)
+                    .where(Article.issue_id == issue_id)
+                    .scalar_subquery()
+                ),
             )
 
             # PDF
@@ -447,11 +557,8 @@ def register_admin_routes(app):
             # Авторы
             _process_authors(article)
 
-            # Порядок — в конец
-            max_order = db.session.query(db.func.max(Article.order)).filter_by(issue_id=issue_id).scalar() or 0
-            article.order = max_order + 1
-
             db.session.commit()
+            invalidate_content_cache()
             flash('Статья добавлена', 'success')
             return redirect(url_for('admin_issue_articles', issue_id=issue_id))
 
@@ -464,7 +571,6 @@ def register_admin_routes(app):
         articles = (
             Article.query
             .filter_by(issue_id=issue_id)
-            .options(db.subqueryload(Article.authors))
             .order_by(Article.order)
             .all()
         )
@@ -475,7 +581,8 @@ def register_admin_routes(app):
     def admin_article_edit(article_id):
         article = Article.query.options(
             db.joinedload(Article.authors),
-            db.joinedload(Article.issue).joinedload(Issue.journal)
+            db.joinedload(Article.issue).joinedload(Issue.journal),
+            db.undefer_group('abstracts')
         ).get_or_404(article_id)
         issue = article.issue
         journal = issue.journal
@@ -507,6 +614,7 @@ def register_admin_routes(app):
             _process_authors(article)
 
             db.session.commit()
+            invalidate_content_cache()
             flash('Статья обновлена', 'success')
             return redirect(url_for('admin_issue_articles', issue_id=issue.id))
 
@@ -519,35 +627,33 @@ def register_admin_routes(app):
         issue_id = article.issue_id
         db.session.delete(article)
         db.session.commit()
+        invalidate_content_cache()
         flash('Статья удалена', 'success')
         return jsonify({'success': True, 'redirect': url_for('admin_issue_articles', issue_id=issue_id)})
 
     @app.route('/admin/articles/<int:article_id>/toggle-published', methods=['POST'])
     @admin_required
     def admin_article_toggle_published(article_id):
-        article = Article.query.get_or_404(article_id)
-        article.is_published = not article.is_published
-        db.session.commit()
-        return jsonify({'success': True, 'is_published': article.is_published})
+        is_published = _toggle_flag(Article.is_published, article_id)
+        invalidate_content_cache()
+        return jsonify({'success': True, 'is_published': is_published})
 
     # ==================== БЭКАПЫ ====================
     @app.route('/admin/backups')
     @admin_required
     def admin_backups():
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        backups_dir = os.path.join(base_dir, 'backups')
-        os.makedirs(backups_dir, exist_ok=True)
+        os.makedirs(BACKUPS_DIR, exist_ok=True)
 
-        backups = []
-        for f in sorted(os.listdir(backups_dir), reverse=True):
-            if f.endswith('.db'):
-                path = os.path.join(backups_dir, f)
-                size = os.path.getsize(path)
-                mtime = datetime.fromtimestamp(os.path.getmtime(path))
-                backups.append({'name': f, 'size': size, 'date': mtime})
+        # Один stat на файл (scandir), а не getsize + getmtime
+        with os.scandir(BACKUPS_DIR) as entries:
+            found = [(e.name, e.stat()) for e in entries if e.name.endswith('.db')]
+        found.sort(reverse=True)
+        backups = [
+            {'name': name, 'size': st.st_size, 'date': datetime.fromtimestamp(st.st_mtime)}
+            for name, st in found
+        ]
 
-        db_path = os.path.join(base_dir, 'instance', 'publisher.db')
-        db_size = os.path.getsize(db_path) if os.path.exists(db_path) else 0
+        db_size = os.path.getsize(DB_PATH) if os.path.exists(DB_PATH) else 0
 
         return render_template('admin/backups.html', backups=backups, db_size=db_size)
 
@@ -561,12 +667,18 @@ def register_admin_routes(app):
     @app.route('/admin/backups/download/<filename>')
     @admin_required
     def admin_backup_download(filename):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        backups_dir = os.path.join(base_dir, 'backups')
         safe = secure_filename(filename)
-        path = os.path.join(backups_dir, safe)
+        path = os.path.join(BACKUPS_DIR, safe)
         if not os.path.exists(path):
             return 'Файл не найден', 404
+        accel_prefix = current_app.config.get('BACKUPS_ACCEL_PREFIX')
+        if accel_prefix:
+            # Файл отдаёт nginx (sendfile), воркер не гоняет байты через себя
+            return Response(headers={
+                'X-Accel-Redirect': accel_prefix + safe,
+                'Content-Type': 'application/octet-stream',
+                'Content-Disposition': f'attachment; filename={safe}',
+            })
         return send_file(path, as_attachment=True, download_name=safe)
 
     # ==================== USERS ====================
@@ -618,17 +730,27 @@ def _process_authors(article):
     emails = request.form.getlist('author_email[]')
     orcids = request.form.getlist('author_orcid[]')
 
+    # Все авторы — одним INSERT, без создания ORM-объектов
+    rows = []
     for i, name in enumerate(names):
         if not name.strip():
             continue
-        author = ArticleAuthor(
-            article_id=article.id,
-            full_name=name.strip(),
-            full_name_en=names_en[i].strip() if i < len(names_en) else None,
-            affiliation=affiliations[i].strip() if i < len(affiliations) else None,
-            affiliation_en=affiliations_en[i].strip() if i < len(affiliations_en) else None,
-            email=emails[i].strip() if i < len(emails) else None,
-            orcid=orcids[i].strip() if i < len(orcids) else None,
-            order=i,
-        )
-        db.session.add(author)
+        rows.append({
+            'article_id': article.id,
+            'full_name': name.strip(),
+            'full_name_en': names_en[i].strip() if i < len(names_en) else None,
+            'affiliation': affiliations[i].strip() if i < len(affiliations) else None,
+            'affiliation_en': affiliations_en[i].strip() if i < len(affiliations_en) else None,
+            'email': emails[i].strip() if i < len(emails) else None,
+            'orcid': orcids[i].strip() if i < len(orcids) else None,
+            'order': i,
+        })
+    if rows:
+        db.session.execute(db.insert(ArticleAuthor), rows)
+
+    # Готовая строка авторов и текст для поиска хранятся в статье; кэш на экземпляре сбрасываем
+    article.authors_cached = Article.format_authors(row['full_name'] for row in rows)
+    article.search_text = Article.build_search_text(
+        article.title, article.abstract, article.keywords, [row['full_name'] for row in rows],
+    )
+    article.__dict__.pop('authors_str', None)
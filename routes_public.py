@@ -1,16 +1,157 @@
-from flask import render_template, request, jsonify, abort
-from sqlalchemy.orm import joinedload, subqueryload
+from collections import defaultdict
+
+import orjson
+from flask import render_template, request, jsonify, abort, current_app, Response
+from sqlalchemy.orm import (
+    contains_eager, joinedload, raiseload, selectinload, undefer_group,
+)
+
+from cache import cache, PUBLIC_STATS_KEY
+from models import db, normalize_text, Journal, Issue, Article, ArticleAuthor
+
+
+# Сколько секунд ответ /api/search живёт в кэше (сервер и браузер)
+API_SEARCH_CACHE_SECONDS = 30
+# Длиннее запрос поиска обрезается — длинная строка только замедляет триграммный поиск
+SEARCH_QUERY_MAX_LENGTH = 80
+# Экранирование спецсимволов LIKE: '%' и '_' в запросе ищутся буквально
+_LIKE_ESCAPE_TABLE = str.maketrans({'\\': '\\\\', '%': '\\%', '_': '\\_'})
+
+
+def _safety_opts():
+    """В DEBUG запрещаем ленивую подгрузку связей: незапланированный N+1 сразу падает.
+
+    sql_only — объекты, уже лежащие в сессии (например, issue.journal), берутся без ошибки.
+    """
+    return (raiseload('*', sql_only=True),) if current_app.debug else ()
+
+
+def _like_pattern(text):
+    """Шаблон LIKE «содержит text» с экранированными '%', '_' и '\\'."""
+    return f'%{text.translate(_LIKE_ESCAPE_TABLE)}%'
+
+
+def search_condition(query):
+    """Условие поиска статьи: название, аннотация, ключевые слова или ФИО автора.
+
+    Одним LIKE по нормализованной колонке search_text (один триграммный индекс
+    в PostgreSQL): запрос нормализуется той же normalize_text, что и колонка,
+    пробельные символы (в т.ч. перевод строки — разделитель полей) сводятся к пробелу.
+    Статьи, для которых init-db ещё не заполнил search_text, ищутся по-старому — ILIKE по полям.
+    """
+    pattern = _like_pattern(query)
+    return db.or_(
+        Article.search_text.like(_like_pattern(' '.join(normalize_text(query).split())), escape='\\'),
+        db.and_(
+            Article.search_text.is_(None),
+            db.or_(
+                Article.title.ilike(pattern, escape='\\'),
+                Article.abstract.ilike(pattern, escape='\\'),
+                Article.keywords.ilike(pattern, escape='\\'),
+                Article.authors.any(ArticleAuthor.full_name.ilike(pattern, escape='\\')),
+            ),
+        ),
+    )
+
+
+@cache.cached(timeout=300, key_prefix=PUBLIC_STATS_KEY)
+def _public_stats():
+    """Число активных журналов, опубликованных выпусков и статей — один запрос.
+
+    Кэш на 5 минут, сброс — invalidate_content_cache.
+    """
+    journals, issues, articles = db.session.execute(db.select(
+        db.select(db.func.count(Journal.id))
+        .where(Journal.is_active == True)
+        .scalar_subquery(),
+        db.select(db.func.count(Issue.id))
+        .where(Issue.is_published == True)
+        .scalar_subquery(),
+        db.select(db.func.count(Article.id))
+        .join(Issue)
+        .where(Issue.is_published == True, Article.is_published == True)
+        .scalar_subquery(),
+    )).one()
+    return {'journals': journals, 'issues': issues, 'articles': articles}
+
+
+def _index_data():
+    """Данные главной: журналы, последние выпуски, статистика, текущий выпуск, избранная статья.
+
+    Вызывается из шаблона внутри {% cache %}: при попадании в кэш запросы не выполняются.
+    """
+    journals = (
+        Journal.query
+        .filter_by(is_active=True)
+        .order_by(Journal.order, Journal.name)
+        .all()
+    )
+
+    # Последние опубликованные выпуски; статьи — для первого из них (текущий выпуск),
+    # одним IN-запросом на все шесть вместо отдельной выборки текущего выпуска
+    recent_issues = (
+        Issue.query
+        .filter_by(is_published=True)
+        .options(joinedload(Issue.journal), selectinload(Issue.articles), *_safety_opts())
+        .order_by(Issue.year.desc(), Issue.number.desc())
+        .limit(6)
+        .all()
+    )
+
+    # Статистика для главной
+    stats = _public_stats()
+
+    # Текущий выпуск (самый свежий с деталями)
+    latest_issue = recent_issues[0] if recent_issues else None
+
+    # Избранная статья: идём по ix_article_published_id с конца, опубликованность
+    # выпуска — EXISTS на каждую строку, выпуск и журнал подтягиваются уже для одной
+    featured_article = (
+        Article.query
+        .filter(Article.is_published == True, Article.issue.has(Issue.is_published == True))
+        .options(
+            joinedload(Article.issue).joinedload(Issue.journal),
+            undefer_group('abstracts'),
+            *_safety_opts()
+        )
+        .order_by(Article.id.desc())
+        .first()
+    )
+
+    return journals, recent_issues, stats, latest_issue, featured_article
 
-from models import db, Journal, Issue, Article, ArticleAuthor
 
+def _journals_data():
+    """Данные страницы журналов: журналы со счётчиками и общее число статей.
 
-def normalize_text(text):
-    """Нормализация текста для поиска."""
-    if not text:
-        return ""
-    text = text.lower()
-    text = text.replace('ё', 'е')
-    return text
+    Вызывается из шаблона внутри {% cache %}: при попадании в кэш запросы не выполняются.
+    """
+    # Журналы сразу с числом опубликованных выпусков и статей — один GROUP BY
+    rows = (
+        db.session.query(
+            Journal,
+            db.func.count(db.distinct(db.case((Issue.is_published == True, Issue.id)))),
+            db.func.count(Article.id),
+        )
+        .outerjoin(Journal.issues)
+        # Статьи — только опубликованные в опубликованных выпусках, как в _public_stats
+        .outerjoin(Article, db.and_(
+            Article.issue_id == Issue.id, Article.is_published == True, Issue.is_published == True,
+        ))
+        .filter(Journal.is_active == True)
+        .group_by(Journal.id)
+        .order_by(Journal.order, Journal.name)
+        .all()
+    )
+    journals = []
+    for journal, published_issues_count, articles_count in rows:
+        journal.published_issues_count = published_issues_count
+        journal.articles_count = articles_count
+        journals.append(journal)
+
+    total_articles = _public_stats()['articles']
+
+    return journals, total_articles
 
 
 def register_public_routes(app):
@@ -20,99 +161,13 @@ def register_public_routes(app):
     @app.route('/')
     def index():
         """Главная страница — список журналов + последние выпуски."""
-        journals = (
-            Journal.query
-            .filter_by(is_active=True)
-            .order_by(Journal.order, Journal.name)
-            .all()
-        )
-
-        # Последние опубликованные выпуски
-        recent_issues = (
-            Issue.query
-            .filter_by(is_published=True)
-            .options(joinedload(Issue.journal))
-            .order_by(Issue.year.desc(), Issue.number.desc())
-            .limit(6)
-            .all()
-        )
-
-        # Статистика для главной
-        total_articles = (
-            db.session.query(db.func.count(Article.id))
-            .join(Issue)
-            .filter(Issue.is_published == True, Article.is_published == True)
-            .scalar() or 0
-        )
-        stats = {
-            'journals': len(journals),
-            'issues': Issue.query.filter_by(is_published=True).count(),
-            'articles': total_articles,
-        }
-
-        # Текущий выпуск (самый свежий с деталями)
-        latest_issue = None
-        if recent_issues:
-            latest_issue = (
-                Issue.query
-                .filter_by(id=recent_issues[0].id)
-                .options(
-                    joinedload(Issue.journal),
-                    subqueryload(Issue.articles).subqueryload(Article.authors)
-                )
-                .first()
-            )
-
-        # Избранная статья
-        featured_article = (
-            Article.query
-            .join(Issue)
-            .join(Journal)
-            .filter(Issue.is_published == True, Article.is_published == True)
-            .options(
-                joinedload(Article.issue).joinedload(Issue.journal),
-                joinedload(Article.authors)
-            )
-            .order_by(Article.id.desc())
-            .first()
-        )
-
-        return render_template('index.html',
-            journals=journals,
-            recent_issues=recent_issues,
-            stats=stats,
-            latest_issue=latest_issue,
-            featured_article=featured_article,
-        )
+        return render_template('index.html', load_index_data=_index_data)
 
     # ==================== ЖУРНАЛЫ ====================
     @app.route('/journals')
     def journals_list():
         """Список всех журналов."""
-        journals = (
-            Journal.query
-            .filter_by(is_active=True)
-            .order_by(Journal.order, Journal.name)
-            .all()
-        )
-
-        # Подсчёт выпусков и статей для каждого журнала
-        for journal in journals:
-            journal.published_issues_count = (
-                Issue.query
-                .filter_by(journal_id=journal.id, is_published=True)
-                .count()
-            )
-            journal.articles_count = (
-                Article.query
-                .join(Issue)
-                .filter(Issue.journal_id == journal.id, Article.is_published == True)
-                .count()
-            )
-
-        total_articles = Article.query.filter_by(is_published=True).count()
-
-        return render_template('journals.html', journals=journals, total_articles=total_articles)
+        return render_template('journals.html', load_journals_data=_journals_data)
 
     # ==================== ЖУРНАЛ ====================
     @app.route('/journal/<slug>')
@@ -120,13 +175,20 @@ def register_public_routes(app):
         """Страница журнала с архивом выпусков."""
         journal = Journal.query.filter_by(slug=slug, is_active=True).first_or_404()
 
-        issues = (
-            Issue.query
-            .filter_by(journal_id=journal.id, is_published=True)
-            .options(subqueryload(Issue.articles).subqueryload(Article.authors))
+        # Выпуски сразу с числом опубликованных статей — один GROUP BY, без объектов статей
+        rows = (
+            db.session.query(Issue, db.func.count(Article.id))
+            .outerjoin(Article, db.and_(Article.issue_id == Issue.id, Article.is_published == True))
+            .filter(Issue.journal_id == journal.id, Issue.is_published == True)
+            .options(*_safety_opts())
+            .group_by(Issue.id)
             .order_by(Issue.year.desc(), Issue.number.desc())
             .all()
         )
+        issues = []
+        for issue, published_articles_count in rows:
+            issue.published_articles_count = published_articles_count
+            issues.append(issue)
 
         # Группировка по годам
         years = {}
@@ -135,10 +197,7 @@ def register_public_routes(app):
 
         # Статистика
         total_issues = len(issues)
-        total_articles = sum(
-            len([a for a in issue.articles if a.is_published])
-            for issue in issues
-        )
+        total_articles = sum(issue.published_articles_count for issue in issues)
 
         # Последний выпуск
         latest_issue = issues[0] if issues else None
@@ -157,9 +216,7 @@ def register_public_routes(app):
         issue = (
             Issue.query
             .filter_by(id=issue_id, journal_id=journal.id, is_published=True)
-            .options(
-                subqueryload(Issue.articles).subqueryload(Article.authors)
-            )
+            .options(selectinload(Issue.articles), *_safety_opts())
             .first_or_404()
         )
 
@@ -175,7 +232,9 @@ def register_public_routes(app):
             Article.query
             .options(
                 joinedload(Article.authors),
-                joinedload(Article.issue).joinedload(Issue.journal)
+                joinedload(Article.issue).joinedload(Issue.journal),
+                undefer_group('abstracts'),
+                *_safety_opts()
             )
             .get_or_404(article_id)
         )
@@ -195,97 +254,92 @@ def register_public_routes(app):
     @app.route('/search')
     def search():
         """Поиск по статьям."""
-        query = request.args.get('q', '').strip()
+        query = request.args.get('q', '').strip()[:SEARCH_QUERY_MAX_LENGTH]
         results = []
 
         if query and len(query) >= 2:
-            like_pattern = f'%{query}%'
             results = (
                 Article.query
-                .join(Issue)
-                .join(Journal)
+                .join(Article.issue)
+                .join(Issue.journal)
                 .filter(
                     Issue.is_published == True,
                     Article.is_published == True,
-                    db.or_(
-                        Article.title.ilike(like_pattern),
-                        Article.abstract.ilike(like_pattern),
-                        Article.keywords.ilike(like_pattern),
-                    )
+                    search_condition(query),
                 )
                 .options(
-                    joinedload(Article.issue).joinedload(Issue.journal),
-                    joinedload(Article.authors)
+                    contains_eager(Article.issue).contains_eager(Issue.journal),
+                    undefer_group('abstracts'),
+                    *_safety_opts()
                 )
                 .order_by(Article.id.desc())
                 .limit(50)
                 .all()
             )
 
-            # Дополнительный поиск по авторам
-            if not results:
-                author_results = (
-                    Article.query
-                    .join(Issue)
-                    .join(Journal)
-                    .join(ArticleAuthor)
-                    .filter(
-                        Issue.is_published == True,
-                        Article.is_published == True,
-                        ArticleAuthor.full_name.ilike(like_pattern)
-                    )
-                    .options(
-                        joinedload(Article.issue).joinedload(Issue.journal),
-                        joinedload(Article.authors)
-                    )
-                    .order_by(Article.id.desc())
-                    .limit(50)
-                    .all()
-                )
-                results = author_results
-
         return render_template('search.html', query=query, results=results)
 
     # ==================== API ====================
     @app.route('/api/search')
+    @cache.cached(timeout=API_SEARCH_CACHE_SECONDS, query_string=True)
     def api_search():
-        """JSON API для клиентского поиска."""
-        query = request.args.get('q', '').strip()
+        """JSON API для клиентского поиска.
+
+        Вызывается на каждое нажатие клавиши — ответ по одинаковому q кэшируется
+        на сервере и в браузере (на прокси/CDN — только для открытого сайта).
+        """
+        query = request.args.get('q', '').strip()[:SEARCH_QUERY_MAX_LENGTH]
         if not query or len(query) < 2:
             return jsonify([])
 
-        like_pattern = f'%{query}%'
-        articles = (
-            Article.query
-            .join(Issue)
-            .join(Journal)
+        # Только поля ответа — кортежи, без ORM-объектов статьи, выпуска и журнала
+        rows = (
+            db.session.query(
+                Article.id, Article.title, Article.authors_cached, Article.doi,
+                Article.pages_from, Article.pages_to,
+                Issue.number, Issue.year, Journal.name,
+            )
+            .join(Article.issue)
+            .join(Issue.journal)
             .filter(
                 Issue.is_published == True,
                 Article.is_published == True,
-                db.or_(
-                    Article.title.ilike(like_pattern),
-                    Article.abstract.ilike(like_pattern),
-                    Article.keywords.ilike(like_pattern),
-                )
-            )
-            .options(
-                joinedload(Article.issue).joinedload(Issue.journal),
-                joinedload(Article.authors)
+                search_condition(query),
             )
             .order_by(Article.id.desc())
             .limit(20)
             .all()
         )
 
-        return jsonify([{
-            'id': a.id,
-            'title': a.title,
-            'authors': a.authors_str,
-            'journal': a.issue.journal.name if a.issue and a.issue.journal else '',
-            'issue': f'№{a.issue.number}/{a.issue.year}' if a.issue else '',
-            'pages': a.pages_str,
-            'doi': a.doi or '',
-        } for a in articles])
+        # Статьи без authors_cached (до init-db) — авторы одним запросом на все
+        missing = [row.id for row in rows if row.authors_cached is None]
+        authors = {}
+        if missing:
+            names = defaultdict(list)
+            for article_id, full_name in (
+                db.session.query(ArticleAuthor.article_id, ArticleAuthor.full_name)
+                .filter(ArticleAuthor.article_id.in_(missing))
+                .order_by(ArticleAuthor.order)
+            ):
+                names[article_id].append(full_name)
+            authors = {article_id: Article.format_authors(names[article_id]) for article_id in missing}
+
+        # orjson сразу отдаёт UTF-8 байты — быстрее jsonify на каждом нажатии клавиши
+        response = Response(orjson.dumps([{
+            'id': row.id,
+            'title': row.title,
+            'authors': authors.get(row.id, row.authors_cached),
+            'journal': row.name,
+            'issue': f'№{row.number}/{row.year}',
+            'pages': Article.format_pages(row.pages_from, row.pages_to),
+            'doi': row.doi or '',
+        } for row in rows]), mimetype='application/json')
+        response.cache_control.max_age = API_SEARCH_CACHE_SECONDS
+        if current_app.config['SITE_PUBLIC']:
+            response.cache_control.public = True
+        else:
+            response.cache_control.private = True
+        return response
 
     # ==================== ОШИБКИ ====================
     @app.errorhandler(404)